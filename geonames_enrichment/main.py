@@ -30,6 +30,7 @@ def main():
     parser.add_argument("-o", "--output_dir")
     parser.add_argument("-f", "--output_filename")
     parser.add_argument("-u", "--geonames_username")
+    parser.add_argument("-c", "--cache_dir", help="Directory for caching API responses between runs (optional)")
     args = parser.parse_args()
 
     logger.info("Starting geolocation enrichment pipeline...")
@@ -39,6 +40,7 @@ def main():
     output_dir = args.output_dir
     output_filename = args.output_filename
     geonames_username = args.geonames_username
+    cache_dir = args.cache_dir
 
     # Define output map title
     map_titles = {
@@ -52,8 +54,11 @@ def main():
 
     # Step 2: Initialize API clients
     logger.info("Initializing API clients...")
-    wikidata_client = WikidataClient()
-    with GndClient("5/second") as gnd_client, GeoNamesClient(geonames_username, "1000/hour") as geonames_client:
+    with (
+        GndClient("5/second", cache_dir=cache_dir) as gnd_client,
+        GeoNamesClient(geonames_username, "1000/hour", cache_dir=cache_dir) as geonames_client,
+        WikidataClient("5/second", cache_dir=cache_dir) as wikidata_client,
+    ):
         # Step 3: Enrich data with geolocation information
         logger.info("Enriching data with geolocation information...")
         enriched_df = enrich_with_geolocation(
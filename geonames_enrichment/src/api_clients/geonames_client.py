@@ -4,7 +4,12 @@ import pandas as pd
 from pandas._libs.missing import NAType  # for type hints
 import requests  # for type hints
 from types import TracebackType  # for type hints
-import xml.etree.ElementTree as ET
+
+try:
+    import orjson as json  # Faster JSON decoding if available
+except ImportError:
+    import json
+
 from src.http_client.http_client import HttpClient
 
 logger = logging.getLogger(__name__)
@@ -23,15 +28,15 @@ class GeoNamesClient:
     for a given GeoNames ID. Can be used as a context manager.
     """
 
-    def __init__(self, username: str, rate_limit: str, base_url: str = "http://api.geonames.org/get",) -> None:
+    def __init__(self, username: str, rate_limit: str, base_url: str = "http://api.geonames.org/get", cache_dir: str | None = None,) -> None:
         self.username = username
-        self.http_client = self._initialize_http_client(rate_limit)
+        self.http_client = self._initialize_http_client(rate_limit, cache_dir)
         self.base_url = base_url
 
     @staticmethod
-    def _initialize_http_client(rate_limit: str) -> HttpClient:
-        """Create and return a new HttpClient instance with rate limiting."""
-        return HttpClient(rate_limit)
+    def _initialize_http_client(rate_limit: str, cache_dir: str | None = None) -> HttpClient:
+        """Create and return a new HttpClient instance with rate limiting and optional response caching."""
+        return HttpClient(rate_limit, cache_dir)
 
     def __enter__(self) -> GeoNamesClient:
         """Enable the use of GeoNamesClient as a context manager."""
@@ -48,18 +53,18 @@ class GeoNamesClient:
         if response is None:
             logger.warning(f"Failed to fetch data for GeoNames ID: {geoname_id}")
             return pd.NA, pd.NA
-        xml_content = ET.fromstring(response.content)
-        status_element = xml_content.find("status")
-        if status_element is not None and "message" in status_element.attrib:
-            message = status_element.attrib["message"]
+        data = json.loads(response.content)
+        if "status" in data:
+            message = data["status"].get("message")
             logger.error(f"GeoNames API error: {message}")
+            self.http_client.drop_from_cache(response.url)  # Don't replay the error from cache on the next run
             raise GeoNamesAPIError(message)
 
         # Extract name (for debugging), latitude, and longitude
-        name = xml_content.findtext("name")
+        name = data.get("name")
         logger.debug(f"GeoNames ID {geoname_id} resolves to name {name}")
-        latitude = xml_content.findtext("lat")
-        longitude = xml_content.findtext("lng")
+        latitude = data.get("lat")
+        longitude = data.get("lng")
 
         if latitude is None or longitude is None:
             logger.warning(f"Failed to fetch data for GeoNames ID: {geoname_id}")
@@ -68,7 +73,7 @@ class GeoNamesClient:
         return float(latitude), float(longitude)
 
     def _fetch_geonames_page(self, geoname_id: str) -> requests.Response | None:
-        """Fetch XML data for a specified GeoName ID from the GeoNames API."""
+        """Fetch JSON data for a specified GeoName ID from the GeoNames API."""
         logger.info(f"Fetching data for GeoNames ID: {geoname_id}")
-        request_url = f"{self.base_url}?geonameId={geoname_id}&username={self.username}"
+        request_url = f"{self.base_url}JSON?geonameId={geoname_id}&username={self.username}"
         return self.http_client.fetch_page(request_url)
@@ -1,4 +1,6 @@
 from __future__ import annotations # Handle forward reference in typehint for __enter__ method
+import asyncio
+import functools
 import logging
 import re
 import pandas as pd
@@ -11,15 +13,20 @@ from src.http_client.http_client import HttpClient  # for type hints
 
 logger = logging.getLogger(__name__)
 
+# Patterns used by GndClient._normalize_input, compiled once at import
+INITIALS_PATTERN = re.compile(r"(\w\.)\s(\w\.)")
+PUNCTUATION_PATTERN = re.compile(r"[!?]")
+
 
 class GndClient:
     """
     GndClient interacts with the lobid-gnd API to fetch geographic area codes and author/title variants.
+    Lookups are coroutines, so many rows can be resolved concurrently with asyncio.gather.
     Can be used as a context manager.
     """
 
-    def __init__(self, rate_limit: str, base_url: str = "https://lobid.org/gnd/") -> None:
-        self.http_client = self._initialize_http_client(rate_limit)
+    def __init__(self, rate_limit: str, base_url: str = "https://lobid.org/gnd/", cache_dir: str | None = None) -> None:
+        self.http_client = self._initialize_http_client(rate_limit, cache_dir)
         self.rate_limit = rate_limit
         self.base_url = base_url
         self.excluded_types = {
@@ -29,11 +36,13 @@ class GndClient:
             "ConferenceOrEvent",
             "MusicalWork",
         }
+        self._author_variant_cache: dict[str, list[str]] = {}
+        self._pending_author_variants: dict[str, asyncio.Task[list[str]]] = {}
 
     @staticmethod
-    def _initialize_http_client(rate_limit: str) -> HttpClient:
-        """Create and return a new HttpClient instance with rate limiting."""
-        return HttpClient(rate_limit)
+    def _initialize_http_client(rate_limit: str, cache_dir: str | None = None) -> HttpClient:
+        """Create and return a new HttpClient instance with rate limiting and optional response caching."""
+        return HttpClient(rate_limit, cache_dir)
 
     def __enter__(self) -> GndClient:
         """Enable the use of GeoNamesClient as a context manager."""
@@ -44,12 +53,16 @@ class GndClient:
         if self.http_client:
             self.http_client.__exit__(exc_type, exc_value, traceback)
 
-    def get_gnd_areacode(self, row: pd.Series, n_pages: int, title_columns: list[str]) -> tuple[str | NAType, str | NAType, str | NAType]:
-        """Retrieve the GND area code by querying the lobid-gnd API using author and title information from the input row."""
+    async def resolve_row(self, author: str, work_wikidata_id: str | NAType, primary_titles: list[str], fallback_titles: list[str], n_pages: int) -> tuple[str | NAType, str | NAType, str | NAType]:
+        """Retrieve the GND area code for the primary titles of a row, and for the fallback titles if no area code was found."""
+        geo_id, geo_label, note = await self.get_gnd_areacode(author, work_wikidata_id, primary_titles, n_pages)
+        if pd.notna(geo_id):
+            return geo_id, geo_label, note
+        logger.debug(f"No GND areacode for {primary_titles} by {author}, trying fallback titles...")
+        return await self.get_gnd_areacode(author, work_wikidata_id, fallback_titles, n_pages)
 
-        author = row["Author"]
-        work_wikidata_id = row.get("Work Wikidata ID", pd.NA)
-        titles = self._extract_titles(row, title_columns)
+    async def get_gnd_areacode(self, author: str, work_wikidata_id: str | NAType, titles: list[str], n_pages: int) -> tuple[str | NAType, str | NAType, str | NAType]:
+        """Retrieve the GND area code by querying the lobid-gnd API for each title in turn, validating results against author and Work Wikidata ID."""
 
         logger.debug(f"Processing titles: {titles} for author {author}")
 
@@ -59,7 +72,7 @@ class GndClient:
             logger.info(f"Retrieving data for {title} by {author}")
             title = self._normalize_input(title)
             # Fetch metadata for title from lobid-gnd API
-            response = self._fetch_gnd_data(f"{self.base_url}search?q={title}&type=Titel&from=0&size={n_pages}&format=json")
+            response = await self._fetch_gnd_data(f"{self.base_url}search?q={title}&type=Titel&from=0&size={n_pages}&format=json")
             if response is None:
                 logger.warning(f"Request for {title} failed, see logs.")
                 break
@@ -73,7 +86,7 @@ class GndClient:
 
             # Check each result and return GND areacode
             for no, item in enumerate(response_dict.get("member", [])):
-                if self._validate_gnd_result(
+                if await self._validate_gnd_result(
                     item, work_wikidata_id, title, author, no
                 ):  # find_matching_result
                     geo_id, geo_label = self._extract_geocode(item)
@@ -81,7 +94,7 @@ class GndClient:
 
         return pd.NA, pd.NA, "No GND areacode"
 
-    def _validate_gnd_result(self, item: dict, work_wikidata_id: str, title: str, author: str, no: int) -> bool:
+    async def _validate_gnd_result(self, item: dict, work_wikidata_id: str, title: str, author: str, no: int) -> bool:
         """Validate a lobid-gnd API result item by checking type, Wikidata ID, and author/title match."""
 
         # Check result item type
@@ -129,7 +142,7 @@ class GndClient:
             return False
 
         # Check if variant auhtor name matches
-        all_names = self._fetch_author_variants(author_id.split("/")[-1])
+        all_names = await self._fetch_author_variants(author_id.split("/")[-1])
         if self._normalize_input(author) in all_names:
             logger.debug(f"Found matching author variant name: {author_label}, {author}")
             return True
@@ -137,10 +150,10 @@ class GndClient:
         logger.info(f"No matching result found for {title} by {author}.")
         return False
 
-    def _fetch_gnd_data(self, url: str) -> requests.Response | None:
-        """Fetch data from the lobid-gnd API."""
+    async def _fetch_gnd_data(self, url: str) -> requests.Response | None:
+        """Fetch data from the lobid-gnd API. The blocking request runs in a worker thread so other lookups can proceed."""
         logger.info(f"Fetching data from {url}")
-        return self.http_client.fetch_page(url)
+        return await self.http_client.fetch_page_async(url)
 
     def _fetch_title_variants(self, item: dict) -> list[str]:
         """Extract and normalize all available titles from lobid-gnd API response."""
@@ -151,10 +164,23 @@ class GndClient:
         logger.debug(f"All titles: {all_titles}.")
         return [self._normalize_input(title) for title in all_titles]
 
-    def _fetch_author_variants(self, author_id: str) -> list[str]:
-        """Fetch alternative author names from lobid-gnd API and normalize variant names."""
+    async def _fetch_author_variants(self, author_id: str) -> list[str]:
+        """Fetch alternative author names from lobid-gnd API and normalize variant names.
+        Results are cached per author id, concurrent lookups of the same author share one request."""
+        if author_id in self._author_variant_cache:
+            return self._author_variant_cache[author_id]
+        task = self._pending_author_variants.get(author_id)
+        if task is None:
+            task = asyncio.ensure_future(self._request_author_variants(author_id))
+            self._pending_author_variants[author_id] = task
+            # Failed requests are not cached, so the next lookup after this one finishes retries
+            task.add_done_callback(lambda _: self._pending_author_variants.pop(author_id, None))
+        return await task
+
+    async def _request_author_variants(self, author_id: str) -> list[str]:
+        """Request and parse the variant names of an author, caching them if the request succeeds."""
         logger.debug("Fetching author name variants...")
-        metadata_response = self._fetch_gnd_data(f"{self.base_url}{author_id}.json")
+        metadata_response = await self._fetch_gnd_data(f"{self.base_url}{author_id}.json")
         if metadata_response is None:
             logger.warning(f"Request to retrieve metadata for {author_id} failed, see logs.")
             return []
@@ -182,7 +208,8 @@ class GndClient:
             all_names.append(full_name)
 
         logger.debug(f"All names: {all_names}")
-        return [self._normalize_input(name) for name in all_names]
+        self._author_variant_cache[author_id] = [self._normalize_input(name) for name in all_names]
+        return self._author_variant_cache[author_id]
 
     def _extract_wikidata_id(self, same_as_lst: list) -> str | NAType:
         """Extract Wikidata ID from lobid-gnd API response."""
@@ -205,28 +232,20 @@ class GndClient:
             logger.info("No GND areacode")
             return pd.NA, pd.NA
 
-    def _extract_titles(self, row: pd.Series, title_columns: list[str]) -> list[str]:
-        """Extract titles from row for specified title columns."""
-        titles = []
-        for col in title_columns:
-            value = row.get(col, pd.NA)
-            if col == "Aliases" and isinstance(value, list):
-                titles.extend(value)
-            elif pd.notna(value):
-                titles.append(value)
-        return titles
-
-    def _normalize_input(self, data: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=100_000)
+    def _normalize_input(data: str) -> str:
         """Normalize input strings by removing accents, question marks, exclamation marks, lowercasing, and trimming whitespace."""
         if pd.isna(data):
             return ""
         data = data.lower()
-        data = unicodedata.normalize("NFD", data)
-        data = "".join(
-            letter for letter in data if unicodedata.category(letter) != "Mn"
-        )
-        data = re.sub(r"(\w\.)\s(\w\.)", r"\1\2", data)
-        data = re.sub(r"[!?]", "", data)
+        if not data.isascii():  # ASCII strings contain no accents to strip
+            data = unicodedata.normalize("NFD", data)
+            data = "".join(
+                letter for letter in data if unicodedata.category(letter) != "Mn"
+            )
+        data = INITIALS_PATTERN.sub(r"\1\2", data)
+        data = PUNCTUATION_PATTERN.sub("", data)
         data_normalized = data.strip()
         logger.debug(f"Input normalized: {data_normalized}.")
         return data_normalized
@@ -1,7 +1,13 @@
+from __future__ import annotations  # Handle forward reference in typehint for __enter__ method
 import logging
 import pandas as pd
 from pandas._libs.missing import NAType  # for type hints
-import pywikibot  # type:ignore
+from pathlib import Path
+import shelve
+import threading
+from types import TracebackType  # for type hints
+
+from src.http_client.http_client import HttpClient
 
 
 logger = logging.getLogger(__name__)
@@ -9,38 +15,101 @@ logger = logging.getLogger(__name__)
 
 class WikidataClient:
     """
-    WikidataClient interacts with the Wikidata API using pywikibot to fetch properties and labels.
+    WikidataClient interacts with the Wikidata API to fetch properties and labels.
+    Entities are fetched in batches via the wbgetentities module and cached on the instance,
+    single properties are fetched via the wbgetclaims module.
+    If a cache directory is given, parsed entities are persisted in a shelve keyed by Q-number.
+    Claims can be fetched from several threads at once, access to the entity cache is serialized.
+    Can be used as a context manager.
     """
 
-    def __init__(self):
-        self.site = pywikibot.Site("wikidata", "wikidata")
-        self.repo = self.site.data_repository()
-
-    def get_wikidata_property(self, row: pd.Series, p_number: str, q_col: str) -> str | NAType:
-        """Fetch a specified Wikidata property (p_number) for a Wikidata Q-number in the row. If there is more than one claim, return first."""
+    def __init__(self, rate_limit: str, base_url: str = "https://www.wikidata.org/w/api.php", batch_size: int = 50, cache_dir: str | None = None) -> None:
+        self.http_client = self._initialize_http_client(rate_limit, cache_dir)
+        self.base_url = base_url
+        self.batch_size = batch_size  # wbgetentities accepts at most 50 ids per request
+        self._entity_cache = self._initialize_entity_cache(cache_dir)
+        self._failed_q_numbers: set[str] = set()  # Not persisted, failed requests are retried in the next run
+        self._claim_cache: dict[tuple[str, str], list[str | None]] = {}
+        self._entity_lock = threading.RLock()  # Guards the entity cache, a shelve is not thread-safe
+
+    @staticmethod
+    def _initialize_http_client(rate_limit: str, cache_dir: str | None = None) -> HttpClient:
+        """Create and return a new HttpClient instance with rate limiting and optional response caching."""
+        return HttpClient(rate_limit, cache_dir)
+
+    @staticmethod
+    def _initialize_entity_cache(cache_dir: str | None = None) -> dict[str, dict] | shelve.Shelf:
+        """Create an in-memory entity cache, or open a persistent one if cache_dir is set."""
+        if cache_dir is None:
+            return {}
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        return shelve.open(str(cache_dir / "wikidata_entities"))
+
+    def __enter__(self) -> WikidataClient:
+        """Enable the use of WikidataClient as a context manager."""
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc_value: BaseException | None, traceback: TracebackType | None) -> None:
+        """Ensure HttpClient and the entity cache are closed when exiting the context."""
+        if self.http_client:
+            self.http_client.__exit__(exc_type, exc_value, traceback)
+        if isinstance(self._entity_cache, shelve.Shelf):
+            self._entity_cache.close()
+
+    def fetch_entities_bulk(self, q_numbers: list[str]) -> dict[str, dict]:
+        """Fetch labels and aliases for a list of Q-numbers in batches and cache the parsed entities. Q-numbers already in the cache, or that failed before, are not fetched again."""
+
+        with self._entity_lock:
+            missing = [
+                q for q in dict.fromkeys(q_numbers)
+                if pd.notna(q) and q not in self._entity_cache and q not in self._failed_q_numbers
+            ]
+            logger.info(f"Fetching {len(missing)} Wikidata entities in batches of {self.batch_size}")
+
+            batches = [missing[start : start + self.batch_size] for start in range(0, len(missing), self.batch_size)]
+            request_urls = [
+                f"{self.base_url}?action=wbgetentities&ids={'|'.join(batch)}&props=labels|aliases&languages=de|en&format=json"
+                for batch in batches
+            ]
+            # Batches are fetched concurrently, the responses are parsed here so only this thread writes to the cache
+            for batch, request_url, response in zip(batches, request_urls, self.http_client.fetch_many(request_urls)):
+                if response is None:
+                    logger.warning(f"Failed to fetch Wikidata entities {batch[0]} to {batch[-1]}")
+                    self._failed_q_numbers.update(batch)
+                    continue
+                response_dict = response.json()
+                if "error" in response_dict:
+                    logger.warning(f"Wikidata API error for {batch[0]} to {batch[-1]}: {response_dict['error'].get('info')}")
+                    self.http_client.drop_from_cache(request_url)
+                    self._failed_q_numbers.update(batch)
+                    continue
+                for key, entity in response_dict.get("entities", {}).items():
+                    # Redirects are resolved by the API, cache the entity under the requested Q-number, test case: wikidata:Q42191769
+                    q_number = entity.get("redirects", {}).get("from", key)
+                    self._entity_cache[q_number] = self._parse_entity(entity)
+
+            return {q: self._entity_cache[q] for q in q_numbers if pd.notna(q) and q in self._entity_cache}
+
+    def get_claim_target_label(self, q_number: str | NAType, p_number: str, lang: str = "en") -> str | NAType:
+        """Fetch a specified Wikidata property (p_number) for a Wikidata Q-number and return the label of the item it points to. If there is more than one claim, return first."""
 
-        q_number = row[q_col]
         logger.info(f"Fetching {p_number} for {q_number}")
         if pd.isna(q_number):
             logger.debug("No Q-number")
             return pd.NA
 
-        item = self._fetch_wikidata_item(q_number)
-
         countries = []
         # Retrieve value(s) for country of origin (P495)
-        if p_number in item.claims:
-            for claim in item.claims[p_number]:
-                country_item = claim.getTarget()
-
-                if (
-                    country_item is None
-                ):  # handle case that country_item is "unknown value" such as here: https://www.wikidata.org/wiki/Q4233718, in this case getTarget returns None and calling .labels causes and exception
-                    logger.debug(f"No data for {q_number}")
-                    return pd.NA
+        for target in self._fetch_claims(q_number, p_number):
+            if (
+                target is None
+            ):  # handle case that target is "unknown value" such as here: https://www.wikidata.org/wiki/Q4233718
+                logger.debug(f"No data for {q_number}")
+                return pd.NA
 
-                country_name = country_item.labels.get("en", pd.NA)  # fallback_value
-                countries.append(country_name)
+            country_name = self._fetch_wikidata_item(target)["labels"].get(lang, pd.NA)  # fallback_value
+            countries.append(country_name)
 
         if len(countries) == 0:  # countries is empty list , or if not countries
             logger.debug(f"No data for {q_number}")
@@ -52,10 +121,15 @@ class WikidataClient:
         country = countries[0]
         return country
 
-    def get_wikidata_labels(self, row, q_col):
-        """Retrieve the German label and all aliases for a Wikidata Q-number in the row."""
+    def resolve_country(self, work_q_number: str | NAType, author_q_number: str | NAType) -> tuple[str | NAType, str | NAType]:
+        """Retrieve P495 (country of origin) for a work, and P19 (place of birth) for its author if the work has no P495."""
+        country = self.get_claim_target_label(work_q_number, "P495")
+        if pd.notna(country):
+            return country, pd.NA
+        return pd.NA, self.get_claim_target_label(author_q_number, "P19")
 
-        q_number = row[q_col]
+    def get_wikidata_labels(self, q_number: str | NAType) -> tuple[str | NAType, list[str] | NAType]:
+        """Retrieve the German label and all aliases for a Wikidata Q-number."""
 
         if pd.isna(q_number):
             logger.debug("No Q-number")
@@ -63,33 +137,52 @@ class WikidataClient:
 
         item = self._fetch_wikidata_item(q_number)
 
-        german_label = item.labels.get("de", pd.NA)
+        german_label = item["labels"].get("de", pd.NA)
 
-        aliases = []
-        for labels in item.aliases.values():
-            aliases.extend(labels)
+        aliases = item["aliases"]
         if not aliases:
             aliases = pd.NA
 
         logger.debug(f"Found labels for {q_number}: {german_label}, {aliases}.")
         return german_label, aliases
 
-    def _fetch_wikidata_item(self, q_number):
-        """Fetch a Wikidata ItemPage by its Q-number. Automatically resolves redirects if necessary."""
-
-        site = pywikibot.Site("wikidata", "wikidata")
-        repo = site.data_repository()
-
-        # Retrieve the Wikidata item using the Q-number
-        item = pywikibot.ItemPage(repo, q_number)
-        try:
-            item.get()
-        except (
-            pywikibot.exceptions.IsRedirectPageError
-        ):  # test case: wikidata:Q42191769
-            logger.error(
-                f"Page [[wikidata:{q_number}]] is a redirect page. Trying to resolve the redirect..."
-            )
-            item = item.getRedirectTarget()
-            item.get()
-        return item
+    def _fetch_wikidata_item(self, q_number: str) -> dict:
+        """Look up a parsed Wikidata entity by its Q-number, fetching it if it has not been cached by fetch_entities_bulk. Each Q-number is requested at most once per run."""
+        with self._entity_lock:
+            if q_number not in self._entity_cache:
+                logger.debug(f"{q_number} not in cache, fetching...")
+                self.fetch_entities_bulk([q_number])
+            return self._entity_cache.get(q_number, {"labels": {}, "aliases": []})
+
+    def _fetch_claims(self, q_number: str, p_number: str) -> list[str | None]:
+        """Fetch the Q-numbers of the values of a single property via wbgetclaims, which returns only the claims for that property."""
+        if (q_number, p_number) in self._claim_cache:
+            return self._claim_cache[(q_number, p_number)]
+
+        request_url = f"{self.base_url}?action=wbgetclaims&entity={q_number}&property={p_number}&format=json"
+        response = self.http_client.fetch_page(request_url)
+        response_dict = response.json() if response is not None else {}
+        if response is None:
+            logger.warning(f"Failed to fetch {p_number} for {q_number}")
+        elif "error" in response_dict:
+            logger.warning(f"Wikidata API error for {p_number} of {q_number}: {response_dict['error'].get('info')}")
+            self.http_client.drop_from_cache(request_url)
+        claims = [self._extract_target_id(claim) for claim in response_dict.get("claims", {}).get(p_number, [])]
+
+        self._claim_cache[(q_number, p_number)] = claims  # Cache failures too, so each claim is requested at most once per run
+        return claims
+
+    @staticmethod
+    def _parse_entity(entity: dict) -> dict:
+        """Reduce a wbgetentities entity to its labels and aliases."""
+        labels = {lang: label["value"] for lang, label in entity.get("labels", {}).items()}
+        aliases = [alias["value"] for lang_aliases in entity.get("aliases", {}).values() for alias in lang_aliases]
+        return {"labels": labels, "aliases": aliases}
+
+    @staticmethod
+    def _extract_target_id(claim: dict) -> str | None:
+        """Extract the Q-number a claim points to. Returns None for "unknown value"/"no value" snaks and non-item values."""
+        value = claim.get("mainsnak", {}).get("datavalue", {}).get("value")
+        if isinstance(value, dict):
+            return value.get("id")
+        return None
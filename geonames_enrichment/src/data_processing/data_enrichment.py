@@ -1,19 +1,27 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import pandas as pd
+from pandas._libs.missing import NAType  # for type hints
+import re
 
+from src.api_clients.geonames_client import GeoNamesAPIError
 # for type hints
 from src.api_clients.geonames_client import GeoNamesClient
 from src.api_clients.gnd_client import GndClient
 from src.api_clients.wikidata_client import WikidataClient
 
-from src.data_processing.data_mapping import wikidata_to_gnd, gnd_to_geonames, match_arealabel
+from src.data_processing.data_mapping import wikidata_to_gnd, gnd_to_geonames
 
 
 logger = logging.getLogger(__name__)
 
+GEONAMES_ID_PATTERN = re.compile(r"(\d+)")
 
-def enrich_with_geolocation(df: pd.DataFrame, gnd_client: GndClient, wikidata_client: WikidataClient, geonames_client: GeoNamesClient, no_pages: int = 100,) -> pd.DataFrame:
-    """ Enrich pandas Dataframe containing book metadata with GeoNames IDs, Wikidata properties, latitude and longitude."""
+
+def enrich_with_geolocation(df: pd.DataFrame, gnd_client: GndClient, wikidata_client: WikidataClient, geonames_client: GeoNamesClient, no_pages: int = 100, max_workers: int = 16, gnd_concurrency: int = 10,) -> pd.DataFrame:
+    """ Enrich pandas Dataframe containing book metadata with GeoNames IDs, Wikidata properties, latitude and longitude.
+    Up to gnd_concurrency lobid-gnd lookups and max_workers Wikidata or GeoNames lookups run at once, the clients' rate limits still apply."""
     logger.info("Starting geolocation enrichment...")
 
     # Add empty columns
@@ -32,96 +40,100 @@ def enrich_with_geolocation(df: pd.DataFrame, gnd_client: GndClient, wikidata_cl
     ]
     df[new_cols] = pd.NA
 
-    # Fetch GND Areacodes for Book Title and Original/Alt Title
-    results = df.apply(
-        gnd_client.get_gnd_areacode,
-        axis=1,
-        args=(no_pages, ("Book Title", "Original/Alt Title")),
-    )
-    df["GND Areacode"], df["GND Arealabel"], df["note"] = zip(*results)
+    # Prefetch labels and aliases of all works from Wikidata
+    wikidata_client.fetch_entities_bulk(df["Work Wikidata ID"].dropna().tolist())
 
-    # Retrieve German Title and Aliases where GND Areacode is missing
-    remaining_rows = df[df["GND Areacode"].isna()]
+    # Retrieve German Title and Aliases as fallback titles for the GND lookup
     german_labels, aliases = zip(
-        *remaining_rows.apply(
-            wikidata_client.get_wikidata_labels, 
-            axis=1, 
-            args=("Work Wikidata ID",)
-        )
+        *[wikidata_client.get_wikidata_labels(q_number) for q_number in df["Work Wikidata ID"]]
     )
-    df.loc[remaining_rows.index, "German Title"] = pd.Series(german_labels, index=remaining_rows.index, dtype="str")
-    df.loc[remaining_rows.index, "Aliases"] = pd.Series(aliases, index=remaining_rows.index, dtype="object")
-
-    # Fetch GND Areacodes for German Title and Aliases
-    remaining_rows = df[df["GND Areacode"].isna()]
-    results = remaining_rows.apply(
-        gnd_client.get_gnd_areacode,
-        axis=1,
-        args=(no_pages, ("German Title", "Aliases")),
+    df["German Title"] = pd.Series(german_labels, index=df.index, dtype="str")
+    df["Aliases"] = pd.Series(aliases, index=df.index, dtype="object")
+
+    # Fetch GND Areacodes for Book Title and Original/Alt Title, falling back to German Title and Aliases
+    results = asyncio.run(
+        _resolve_unique_titles(
+            df, ("Book Title", "Original/Alt Title"), ("German Title", "Aliases"), gnd_client, no_pages, gnd_concurrency
+        )
     )
-    gnd_areacode, gnd_arealabel, note = zip(*results)
-    df.loc[remaining_rows.index, "GND Areacode"] = pd.Series(gnd_areacode, index=remaining_rows.index, dtype="str")
-    df.loc[remaining_rows.index, "GND Arealabel"] = pd.Series(gnd_arealabel, index=remaining_rows.index, dtype="str")
-    df.loc[remaining_rows.index, "note"] = pd.Series(note, index=remaining_rows.index, dtype="str")
+    df[["GND Areacode", "GND Arealabel", "note"]] = results
 
     df["GND Areacode"] = df["GND Areacode"].str.strip()
 
-    # Fetch P495 (Country of Origin) and P19 (Place of Birth)
-    remaining_rows = df[df["GND Areacode"].isna() | (df["GND Areacode"] == "https://d-nb.info/standards/vocab/gnd/geographic-area-code#ZZ")]
-    results = remaining_rows.apply(
-        wikidata_client.get_wikidata_property, 
-        axis=1, 
-        args=("P495", "Work Wikidata ID")
-    )
-    df.loc[remaining_rows.index, "P495"] = results
-
-    remaining_rows = df[(df["GND Areacode"].isna() | (df["GND Areacode"] == "https://d-nb.info/standards/vocab/gnd/geographic-area-code#ZZ")) & df["P495"].isna()]
-    results = remaining_rows.apply(
-        wikidata_client.get_wikidata_property,
-        axis=1,
-        args=("P19", "Author Wikidata ID"),
-    )
-    df.loc[remaining_rows.index, "P19"] = results
+    # Fetch P495 (Country of Origin), falling back to P19 (Place of Birth)
+    missing_areacode = df["GND Areacode"].isna() | (df["GND Areacode"] == "https://d-nb.info/standards/vocab/gnd/geographic-area-code#ZZ")
+    pairs = list(df.loc[missing_areacode, ["Work Wikidata ID", "Author Wikidata ID"]].itertuples(index=False, name=None))
+    unique_pairs = list(dict.fromkeys(pairs))  # Concurrent lookups of the same pair would bypass the claim cache
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        resolved = dict(zip(unique_pairs, executor.map(lambda pair: wikidata_client.resolve_country(*pair), unique_pairs)))
+    results = [resolved[pair] for pair in pairs]
+    if results:
+        df.loc[missing_areacode, ["P495", "P19"]] = results
 
     # Map Wikidata P495 values to GND areacodes
     arealabel_dict = wikidata_to_gnd()
-    df["GND Mapping"] = df["P495"].apply(match_arealabel, args=(arealabel_dict,))
+    df["GND Mapping"] = df["P495"].map(arealabel_dict).fillna(pd.NA).str.strip()
 
-    # Map GND IDs to Geonames IDs
+    # Map GND IDs to Geonames IDs, falling back to the GND areacodes mapped from P495
     geonames_dict = gnd_to_geonames()
-    df["GND Areacode"] = df["GND Areacode"].str.strip()
-    df["GND Mapping"] = df["GND Mapping"].str.strip()
+    # Cast to string, so the column stays string typed for .str.extract even if no row has a GeoNames ID
+    areacode_geonames_ids = df["GND Areacode"].map(geonames_dict).astype("string")
+    mapping_geonames_ids = df["GND Mapping"].map(geonames_dict).astype("string")
+    df["Geonames ID"] = areacode_geonames_ids.where(areacode_geonames_ids.notna(), mapping_geonames_ids)
+
+    # Fetch latitude and longitude from Geonames API, once per unique GeoNames ID
+    df["Geonames ID"] = df["Geonames ID"].str.extract(GEONAMES_ID_PATTERN, expand=False)
+    unique_geonames_ids = df["Geonames ID"].dropna().unique().tolist()
+    logger.info(f"Fetching coordinates for {len(unique_geonames_ids)} unique GeoNames IDs")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            geoname_id: executor.submit(geonames_client.get_geonames_data, geoname_id)
+            for geoname_id in unique_geonames_ids
+        }
+        try:
+            coordinates = {geoname_id: future.result() for geoname_id, future in futures.items()}
+        except GeoNamesAPIError:
+            executor.shutdown(cancel_futures=True)  # Don't send the remaining requests once the quota is exceeded
+            raise
+
+    latitudes = {geoname_id: latitude for geoname_id, (latitude, _) in coordinates.items()}
+    longitudes = {geoname_id: longitude for geoname_id, (_, longitude) in coordinates.items()}
+    df["Latitude"] = df["Geonames ID"].map(latitudes).astype("Float64")
+    df["Longitude"] = df["Geonames ID"].map(longitudes).astype("Float64")
 
-    remaining_rows = df[df["Geonames ID"].isna()]
-    df.loc[remaining_rows.index, "Geonames ID"] = remaining_rows["GND Areacode"].apply(
-        lambda x: geonames_dict.get(x, pd.NA)
-    )
+    logger.info("Geolocation enrichment completed.")
+    return df
 
-    remaining_rows = df[df["Geonames ID"].isna()]
-    df.loc[remaining_rows.index, "Geonames ID"] = remaining_rows["GND Mapping"].apply(
-        lambda x: geonames_dict.get(x, pd.NA)
-    )
 
-    # Fetch latitude and longitude from Geonames API
-    geonames_df = df.copy()
-    geonames_df["Geonames ID"] = geonames_df["Geonames ID"].str.extract(
-        r"(\d+)", expand=False
-    )
+async def _resolve_unique_titles(df: pd.DataFrame, primary_columns: tuple[str, ...], fallback_columns: tuple[str, ...], gnd_client: GndClient, no_pages: int, concurrency: int) -> list[tuple[str | NAType, str | NAType, str | NAType]]:
+    """Retrieve GND areacodes concurrently, once per unique combination of author, Work Wikidata ID and titles, and return the results in row order."""
+    semaphore = asyncio.Semaphore(concurrency)
 
-    latitude_list = []
-    longitude_list = []
-    for geoname_id in geonames_df["Geonames ID"]:
-        if pd.notna(geoname_id):
-            latitude, longitude = geonames_client.get_geonames_data(geoname_id)
-            latitude_list.append(latitude)
-            longitude_list.append(longitude)
-        else:
-            latitude_list.append(pd.NA)
-            longitude_list.append(pd.NA)
-
-    geonames_df["Latitude"] = latitude_list
-    geonames_df["Longitude"] = longitude_list
-
-    df.update(geonames_df)
-    logger.info("Geolocation enrichment completed.")
-    return df
+    columns = ["Author", "Work Wikidata ID", *primary_columns, *fallback_columns]
+    n_primary = len(primary_columns)
+    keys = [
+        (author, work_wikidata_id, tuple(_flatten_titles(titles[:n_primary])), tuple(_flatten_titles(titles[n_primary:])))
+        for author, work_wikidata_id, *titles in df[columns].itertuples(index=False, name=None)
+    ]
+    unique_keys = list(dict.fromkeys(keys))
+    logger.info(f"Resolving {len(unique_keys)} unique title queries for {len(keys)} rows")
+
+    async def get_gnd_areacode(author: str, work_wikidata_id: str | NAType, primary_titles: tuple[str, ...], fallback_titles: tuple[str, ...]) -> tuple[str | NAType, str | NAType, str | NAType]:
+        async with semaphore:
+            return await gnd_client.resolve_row(author, work_wikidata_id, list(primary_titles), list(fallback_titles), no_pages)
+
+    results = await asyncio.gather(*(get_gnd_areacode(*key) for key in unique_keys))
+    resolved = dict(zip(unique_keys, results))
+    return [resolved[key] for key in keys]
+
+
+def _flatten_titles(values: list[str | list[str] | NAType]) -> list[str]:
+    """Collect the titles from the title column values of a row, skipping missing values. Aliases are lists of titles."""
+    titles = []
+    for value in values:
+        if isinstance(value, list):
+            titles.extend(value)
+        elif pd.notna(value):
+            titles.append(value)
+    return titles
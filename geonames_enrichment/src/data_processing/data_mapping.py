@@ -1,27 +1,24 @@
+import functools
 import logging
 import pandas as pd
 from pandas._libs.missing import NAType  # for type hints
+from pathlib import Path
+import pickle
+import requests
 from rdflib import Graph, Literal
 from rdflib.namespace import RDFS, SKOS
 
 logger = logging.getLogger(__name__)
 
+GND_AREACODE_URL = "https://d-nb.info/standards/vocab/gnd/geographic-area-code.rdf"
+GND_AREACODE_CACHE_PATH = Path("~/.cache/geoenrich/gnd_areacodes.pkl").expanduser()
+
 
 def gnd_to_geonames() -> dict:
     """Map GND Areacodes to GeoNames URIs."""
 
     logger.debug("Retrieving GeoNames URIs for GND Areacodes...")
-    g = Graph()
-
-    # Load RDF-XML data from URL and parse for geonames URIs
-    g.parse(
-        "https://d-nb.info/standards/vocab/gnd/geographic-area-code.rdf", format="xml"
-    )
-
-    geonames_dict = {}
-    for subj, pred, obj in g:
-        if pred == RDFS.seeAlso and str(obj).startswith("http://www.geonames.org/"):
-            geonames_dict[str(subj)] = str(obj)
+    geonames_dict = dict(_load_gnd_graph()[0])
 
     # Map GND areacodes for Roman Empire (XT), Ancient Greece (XS), Arab Countries (XX) to GeoNames IDs for Italy, Greece, Arab Gulf countries
     # Map GND areacodes for Czechoslovakia (XA-CSHH) and Soviet Union to GeoNames IDs for Czech Republic, Russian Federation
@@ -43,17 +40,7 @@ def wikidata_to_gnd() -> dict:
     logger.debug(
         "Mapping english language GND arealabels and Wikidata values to GND areacodes..."
     )
-    g = Graph()
-
-    # Load RDF-XML data from URL and parse for English language arealabels
-    g.parse(
-        "https://d-nb.info/standards/vocab/gnd/geographic-area-code.rdf", format="xml"
-    )
-
-    arealabel_dict = {}
-    for subj, pred, obj in g:
-        if pred == SKOS.prefLabel and isinstance(obj, Literal) and obj.language == "en":
-            arealabel_dict[str(obj)] = str(subj)
+    arealabel_dict = dict(_load_gnd_graph()[1])
 
     # Map Wikidata labels that do not correspond to GND arealabels to GND areacodes
     special_cases_dict = {
@@ -81,7 +68,67 @@ def wikidata_to_gnd() -> dict:
 
 def match_arealabel(p_value: str, gnd_arealabel_dict: dict) -> str | NAType:
     """Match GND arealabel to wikidata value for property P495 and return corresponding GND areacode"""
-    for arealabel, areacode in gnd_arealabel_dict.items():
-        if pd.notna(p_value) and arealabel == p_value:
-            return areacode
-    return pd.NA
+    if pd.isna(p_value):
+        return pd.NA
+    return gnd_arealabel_dict.get(p_value, pd.NA)
+
+
+@functools.lru_cache(maxsize=1)
+def _load_gnd_graph() -> tuple[dict, dict]:
+    """
+    Parse the GND areacode vocabulary for GeoNames URIs and English language arealabels.
+    The result is pickled together with the ETag of the vocabulary and reused until the ETag changes.
+    """
+
+    version = _fetch_gnd_vocabulary_version()
+    cached = _read_cached_gnd_dicts()
+    if cached is not None and (version is None or cached[0] == version):
+        logger.debug(f"Using cached GND areacodes from {GND_AREACODE_CACHE_PATH}")
+        return cached[1]
+
+    # Load RDF-XML data from URL and parse for geonames URIs and English language arealabels
+    logger.debug("Parsing GND areacode vocabulary...")
+    g = Graph()
+    g.parse(GND_AREACODE_URL, format="xml")
+    geonames_dict, arealabel_dict = _build_gnd_dicts(g)
+
+    if version is not None:
+        GND_AREACODE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with GND_AREACODE_CACHE_PATH.open("wb") as f:
+            pickle.dump((version, (geonames_dict, arealabel_dict)), f)
+
+    return geonames_dict, arealabel_dict
+
+
+def _build_gnd_dicts(g: Graph) -> tuple[dict, dict]:
+    """Collect GeoNames URIs and English language arealabels per GND areacode in a single pass over the graph."""
+    see_also, pref_label = RDFS.seeAlso, SKOS.prefLabel
+    geonames_dict = {}
+    arealabel_dict = {}
+    for subj, pred, obj in g:
+        if pred == see_also:
+            if str(obj).startswith("http://www.geonames.org/"):
+                geonames_dict[str(subj)] = str(obj)
+        elif pred == pref_label and isinstance(obj, Literal) and obj.language == "en":
+            arealabel_dict[str(obj)] = str(subj)
+    return geonames_dict, arealabel_dict
+
+
+def _fetch_gnd_vocabulary_version() -> str | None:
+    """Return the ETag (or Last-Modified date) of the GND areacode vocabulary, None if it can't be retrieved."""
+    try:
+        response = requests.head(GND_AREACODE_URL, timeout=10, allow_redirects=True)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Could not check version of GND areacode vocabulary: {e}")
+        return None
+    return response.headers.get("ETag") or response.headers.get("Last-Modified")
+
+
+def _read_cached_gnd_dicts() -> tuple[str, tuple[dict, dict]] | None:
+    """Load the pickled GND areacode dicts and their version, None if there is no usable cache file."""
+    try:
+        with GND_AREACODE_CACHE_PATH.open("rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
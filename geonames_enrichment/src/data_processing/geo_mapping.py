@@ -1,3 +1,4 @@
+import functools
 import logging
 import pandas as pd  # for type hints
 import geopandas as gpd
@@ -16,40 +17,35 @@ def make_map(df: pd.DataFrame, map_title: str, output_dir: str, lang: str = "en"
     if not required_columns.issubset(df.columns):
         raise ValueError(f"Missing columns: {required_columns - set(df.columns)}")
 
-    # Step 2: Prepare Geodataframe
-    # Subset df only column containing Latitude and Longitude
-    geonames_df = df.dropna(subset=["Latitude", "Longitude"], inplace=False)
-    # Create Geodataframe with point geometries
-    geonames_df["geometry"] = gpd.points_from_xy(
-        geonames_df.Longitude, geonames_df.Latitude
-    )
-    geo_df = gpd.GeoDataFrame(geonames_df, geometry="geometry")
-    # Aggregate occurrences
+    # Step 2: Aggregate occurrences
+    # Only one marker per unique latitude and longitude is drawn, so count occurrences instead of keeping every row
     grouped = (
-        geo_df.groupby(["Latitude", "Longitude"]).size().reset_index(name="counts")
+        df.dropna(subset=["Latitude", "Longitude"])
+        .groupby(["Latitude", "Longitude"], sort=False)
+        .size()
+        .reset_index(name="counts")
     )
-    # Merge the counts back to the original Geodataframe
-    geo_df = geo_df.merge(grouped, on=["Latitude", "Longitude"])
-    # Scale the area of each point proportionally to the number of occurrences at each latitude and longitude
-    geo_df["point_size"] = geo_df["counts"] * scaling_factor
     # Sort to prevent large bubbles overlapping small ones
-    geo_df = geo_df.sort_values(by="point_size", ascending=False)
+    grouped = grouped.sort_values(by="counts", ascending=False)
 
     # Step 3: Plot map
     # Load world map
-    world = gpd.read_file(geodatasets.get_path("naturalearth.land"))
+    world_boundary = _load_world_boundary()
     # Create figure and axes object
-    plt.figure(figsize=(15, 10))
-    ax = plt.gca()  # Get the current axis
+    fig, ax = plt.subplots(figsize=(15, 10))
     # Plot the world map
-    world.boundary.plot(ax=ax, alpha=0.4, color="black", linewidth=1)
-    # Plot the points
-    geo_df.plot(
-        ax=ax,
-        markersize=geo_df["point_size"],
-        color="#1f77b4",
-        edgecolor="white",
+    world_boundary.plot(ax=ax, alpha=0.4, color="black", linewidth=1)
+    # Plot the points as a single scatter collection instead of one artist per geometry
+    ax.scatter(
+        grouped["Longitude"].to_numpy(dtype=float),
+        grouped["Latitude"].to_numpy(dtype=float),
+        # Scale the area of each point proportionally to the number of occurrences at each latitude and longitude
+        s=grouped["counts"].to_numpy() * scaling_factor,
+        c="#1f77b4",
+        edgecolors="white",
         alpha=0.6,
+        linewidths=0.5,
+        rasterized=True,
     )
     # Set labels and filename
     if lang == "de":
@@ -57,13 +53,22 @@ def make_map(df: pd.DataFrame, map_title: str, output_dir: str, lang: str = "en"
     else:
         xlab, ylab, filename = "Longitude", "Latitude", "map-en"
     # Plot axes and title
-    plt.title(map_title)
-    plt.xlabel(xlab)
-    plt.ylabel(ylab)
-    plt.grid(False)
+    ax.set_title(map_title)
+    ax.set_xlabel(xlab)
+    ax.set_ylabel(ylab)
+    ax.grid(False)
 
     # Step 4: Save map
     output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True)
     map_path = output_dir / f"{filename}.png"
-    plt.savefig(map_path, dpi=600)
+    fig.savefig(map_path, dpi=200)
+    # Release the figure, pyplot keeps every open figure alive
+    plt.close(fig)
+
+
+@functools.lru_cache(maxsize=1)
+def _load_world_boundary() -> gpd.GeoSeries:
+    """Read the Natural Earth land polygons once and return their boundaries, reused by all maps generated in a run."""
+    world = gpd.read_file(geodatasets.get_path("naturalearth.land"))
+    return world.boundary
@@ -1,42 +1,70 @@
 import logging
 from pathlib import Path
 import pandas as pd
+from pandas._libs.parsers import STR_NA_VALUES  # pandas' default NA markers
+from pandas.io.common import dedup_names  # pandas' handling of duplicate column names
+import pyarrow as pa
+import pyarrow.csv as pacsv
 
 logger = logging.getLogger(__name__)
 
 
-def read_input_df(df_path: str) -> pd.DataFrame:
-    """Read and return pandas DataFrame from a TSV file with specified dtypes."""
+def read_input_df(df_path: str, categorical_cols: list[str] | None = None) -> pd.DataFrame:
+    """Read and return pandas DataFrame from a TSV file with specified dtypes. Columns in categorical_cols, f.e. low-cardinality ones like "nationality", are read as category."""
 
     df_path = Path(df_path)
-    # Load only header row to get column names
-    input_cols = pd.read_csv(df_path, sep="\t", encoding="UTF-8", nrows=0).columns
+    parse_options = pacsv.ParseOptions(delimiter="\t")
+    # Let pyarrow parse only the header to get column names, so quoting and a BOM are handled like in the data rows
+    with pacsv.open_csv(df_path, parse_options=parse_options) as reader:
+        header = reader.schema.names
+    # Name blank and duplicate columns like pandas does, f.e. "Unnamed: 14" and "Author.1"
+    input_cols = dedup_names([col or f"Unnamed: {i}" for i, col in enumerate(header)], is_potential_multiindex=False)
     int_cols = ["ID", "Wilson score"]
 
-    # Set all columns to str except the ones in int_cols, which are Int32 (pd.Int32Dtype())
-    dtype_dict = {col: ("Int32" if col in int_cols else "str") for col in input_cols}
+    categorical_cols = categorical_cols or []
 
-    input_df = pd.read_csv(df_path, sep="\t", encoding="UTF-8", dtype=dtype_dict, na_values=["NaN"])
+    # Set all columns to str except the ones in int_cols, which are Int32 (pd.Int32Dtype()),
+    # and the ones in categorical_cols, which are dictionary encoded and become category
+    column_types = {
+        col: (
+            pa.int32() if col in int_cols
+            else pa.dictionary(pa.int32(), pa.string()) if col in categorical_cols
+            else pa.string()
+        )
+        for col in input_cols
+    }
+
+    # pyarrow parses the file in parallel, pass the types up front so no values are inferred and cast back to str
+    table = pacsv.read_csv(
+        df_path,
+        read_options=pacsv.ReadOptions(column_names=input_cols, skip_rows=1),  # Skip the header parsed above
+        parse_options=parse_options,
+        convert_options=pacsv.ConvertOptions(
+            column_types=column_types, null_values=sorted(STR_NA_VALUES), strings_can_be_null=True
+        ),
+    )
+    input_df = table.to_pandas(types_mapper={pa.int32(): pd.Int32Dtype()}.get)
 
     input_df.fillna(value=pd.NA, inplace=True)
     return input_df
 
 
 def save_enriched_df(df: pd.DataFrame, filename: str, output_dir: str, debug_mode: bool = False) -> None:
-    """Save pandas DataFrame as pickle and TSV file in the outputs directory."""
+    """Save pandas DataFrame as Parquet and TSV file in the outputs directory."""
 
     columns_to_remove = ["GND Mapping", "German Title", "Aliases", "note"]
     if not debug_mode:
         # Clean up dataframe before export
-        df = df.drop(columns=[col for col in columns_to_remove if col in df.columns])
+        df = df.drop(columns=columns_to_remove, errors="ignore")
 
     # Define outputs directory and create it if it doesn't exist
     output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True)
 
     # Create file paths using pathlib
-    pkl_path = output_dir / f"{filename}.pkl"
+    parquet_path = output_dir / f"{filename}.parquet"
     tsv_path = output_dir / f"{filename}.tsv"
 
-    df.to_pickle(pkl_path)
+    df.to_parquet(parquet_path, engine="pyarrow", compression="zstd", index=False)
+    # Written by pandas, so floats keep their format (f.e. 39.0) regardless of the other values in the frame
     df.to_csv(tsv_path, sep="\t", encoding="utf-8", index=False)
@@ -1,10 +1,18 @@
 from __future__ import annotations  # Handle forward reference in typehint for __enter__ method
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import functools
 import logging
+from pathlib import Path
+import threading
 import time
 
-from limits import strategies, storage, parse
+from limits import parse
 import requests
 from requests.adapters import HTTPAdapter
+import requests_cache
 from types import TracebackType  # for type hints
 from typing import Callable, Concatenate  # for type hints
 from urllib3.util import Retry
@@ -12,31 +20,43 @@ from urllib3.util import Retry
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=16)
+def _parse_rate(rate_limit: str) -> tuple[int, int]:
+    """Parse a rate limit string such as "5/second" and return the number of allowed requests and the period in seconds. Cached, so clients sharing a rate limit parse it once."""
+    limit = parse(rate_limit)  # returns RateLimitItemPerSecond or RateLimitItemPerHour
+    return limit.amount, limit.get_expiry()
+
+
 # Decorator for rate limiting
 def rate_limited[Self, **P, T](func: Callable[Concatenate[Self, P], T],) -> Callable[Concatenate[Self, P], T]:  # pyright: ignore
     """
     Decorator to enforce rate limiting on instance methods.
 
     This decorator ensures that calls to the decorated method comply with
-    the rate limit set in the instance. If the limit is exceeded, it pauses
-    execution until the rate limit resets before retrying the request.
+    the rate limit set in the instance. It implements a moving window: at most
+    `_amount` requests are sent within any `_period` seconds. Up to `_amount`
+    requests may be sent at once, if the window is full, it pauses execution
+    until the oldest request in the window has expired.
+    The timestamps are guarded by a lock, so the rate limit is honored across threads.
 
     The decorated function must be an instance method of a class that has:
-    - A `_limiter` attribute (an instance of `MovingWindowRateLimiter`).
-    - A `_limit` attribute (a rate limit object, see https://limits.readthedocs.io/en/stable/api.html#limits.RateLimitItem).
-    - A `_key` attribute (a string identifying the rate limit scope).
+    - A `_amount` attribute (the number of requests allowed per period).
+    - A `_period` attribute (the length of the window in seconds).
+    - A `_timestamps` attribute (a `deque` with maxlen `_amount` holding the `time.monotonic()` timestamps of the latest requests).
+    - A `_lock` attribute (a `threading.Lock` shared by all threads using the instance).
     """
 
     def wrapper(self, *args: P.args, **kwargs: P.kwargs) -> T:
 
-        if not self._limiter.hit(self._limit, self._key):  # Wait until rate limit resets
-            reset_time = self._limiter.get_window_stats(
-                self._limit, self._key
-            ).reset_time
-            wait_time = reset_time - time.time()
-            logger.debug(f"Wait time is type {type(wait_time)}")
-            logger.info(f"Rate limit exceeded. Waiting for {wait_time:.2f} seconds before retrying...")
-            time.sleep(wait_time)
+        with self._lock:  # Other threads wait here while this one sleeps
+            now = time.monotonic()
+            if len(self._timestamps) == self._amount:  # Wait until the oldest request leaves the window
+                wait_time = self._timestamps[0] + self._period - now
+                if wait_time > 0:
+                    logger.info(f"Rate limit exceeded. Waiting for {wait_time:.2f} seconds before retrying...")
+                    time.sleep(wait_time)
+                    now = time.monotonic()
+            self._timestamps.append(now)  # The deque is bounded, the oldest timestamp is dropped
 
         return func(self, *args, **kwargs)
 
@@ -46,37 +66,70 @@ def rate_limited[Self, **P, T](func: Callable[Concatenate[Self, P], T],) -> Call
 class HttpClient:
     """
     HttpClient handles HTTP requests with rate limiting and automatic retries.
+    Requests can be made one at a time, from coroutines or concurrently for a list of urls, all share the rate limit.
+    If a cache directory is given, responses are cached on disk in an SQLite database keyed by request URL.
     Can be used as a context manager.
     """
 
-    def __init__(self, rate_limit: str) -> None:
-        self.session = self._setup_session()
+    def __init__(self, rate_limit: str, cache_dir: str | None = None) -> None:
+        self.session = self._setup_session(cache_dir)
 
         # Rate limiter settings
-        self._store = storage.MemoryStorage()
-        self._limiter = strategies.MovingWindowRateLimiter(self._store)
-        self._limit = parse(rate_limit)  # returns RateLimitItemPerSecond or RateLimitItemPerHour
-        self._key = "global"
+        self._amount, self._period = _parse_rate(rate_limit)
+        # Timestamps of the latest requests, only the last _amount are needed to check the moving window
+        self._timestamps: deque[float] = deque(maxlen=self._amount)
+        self._lock = threading.Lock()
 
     @staticmethod
-    def _setup_session() -> requests.Session:
-        """Set up an HTTP session with retry logic and default headers."""
-        session = requests.Session()
+    def _setup_session(cache_dir: str | None = None) -> requests.Session:
+        """Set up an HTTP session with retry logic and default headers. Use a cached session if cache_dir is set."""
+        if cache_dir is None:
+            session = requests.Session()
+        else:
+            cache_dir = Path(cache_dir)
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            session = requests_cache.CachedSession(
+                cache_name=str(cache_dir / "geoenrich_http"),
+                backend="sqlite",
+                expire_after=timedelta(days=30),
+            )
         retries = Retry(
             backoff_factor=0.1,
             total=5,
             connect=2,  # Retries failed connection attempts (ConnectionError)
             read=2,  # Retries on read timeouts (ReadTimeout)
-            status_forcelist=[500, 502, 503, 504],  # Retries on HTTP status codes (HTTPError)
+            status_forcelist=[500, 502, 503, 504],  # Retries on HTTP status codes (HTTPError), 429 is left to the rate limiter
+            allowed_methods=["GET"],
+            respect_retry_after_header=True,
         )
-        session.mount("https://", HTTPAdapter(max_retries=retries))
+        # Pool size matches the number of threads fetching concurrently, GeoNames is served over http
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retries)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
         user_agent = f"1001 books (https://github.com/temporal-communities/1001-books) requests/{requests.__version__}"
         session.headers = {"User-Agent": user_agent, "Accept": "*/*"}
         return session
 
-    @rate_limited
     def fetch_page(self, url: str, timeout: int = 10) -> requests.Response | None:
-        """Make HTTP request for a url."""
+        """Make HTTP request for a url. Responses served from the cache don't count against the rate limit."""
+        cached_response = self._get_cached_response(url)
+        if cached_response is not None:
+            logger.info(f"Fetched {url} from cache")
+            return cached_response
+        return self._fetch_page(url, timeout)
+
+    def _get_cached_response(self, url: str) -> requests.Response | None:
+        """Return the cached response for a url without sending a request, or None if it is not cached or has expired."""
+        if not isinstance(self.session, requests_cache.CachedSession):
+            return None
+        response = self.session.get(url, only_if_cached=True)
+        if response.status_code == 504:  # requests-cache answers with 504 Gateway Timeout if there is no usable response
+            return None
+        return response
+
+    @rate_limited
+    def _fetch_page(self, url: str, timeout: int = 10) -> requests.Response | None:
+        """Make rate limited HTTP request for a url."""
 
         try:
             response = self.session.get(url, timeout=timeout)
@@ -89,6 +142,20 @@ class HttpClient:
             logger.warning(f"Request for {url} failed with exception: {e}")
         return None
 
+    async def fetch_page_async(self, url: str, timeout: int = 10) -> requests.Response | None:
+        """Make HTTP request for a url in a worker thread, so the event loop keeps running while waiting for the rate limit or the response."""
+        return await asyncio.to_thread(self.fetch_page, url, timeout)
+
+    def fetch_many(self, urls: list[str], max_workers: int = 8, timeout: int = 10) -> list[requests.Response | None]:
+        """Make HTTP requests for several urls concurrently, as far as the rate limit allows. Responses are returned in the order of urls."""
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda url: self.fetch_page(url, timeout), urls))
+
+    def drop_from_cache(self, url: str) -> None:
+        """Remove the cached response for a url, f.e. if the API reported an error with status code 200."""
+        if isinstance(self.session, requests_cache.CachedSession):
+            self.session.cache.delete(urls=[url])
+
     def close(self) -> None:
         """Close the HTTP session."""
         self.session.close()
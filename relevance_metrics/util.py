@@ -1,10 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
 import polars as pl
 import requests
 
 
 def format_query(query: str, qids: list[str]) -> str:
     # Create a formatted string of Wikidata IDs prefixed with "wd:"
-    formatted_qids = " ".join([f"wd:{qid}" for qid in qids])
+    formatted_qids = " ".join(f"wd:{qid}" for qid in qids)
     return query % formatted_qids
 
 
@@ -12,10 +15,15 @@ def query_wdqs(query: str, qids: list[str]) -> pl.DataFrame:
     url = "https://query.wikidata.org/sparql"
 
     formatted_query = format_query(query, qids)
+    # Encode the form body once, so requests sends the bytes as they are
+    body = urlencode({"query": formatted_query}).encode()
     res = requests.post(
         url,
-        data={"query": formatted_query},
-        headers={"Accept": "text/tab-separated-values"},
+        data=body,
+        headers={
+            "Accept": "text/tab-separated-values",
+            "Content-Type": "application/x-www-form-urlencoded",
+        },
     )
     print(f"Request took {res.elapsed.total_seconds()} seconds.")
 
@@ -23,8 +31,19 @@ def query_wdqs(query: str, qids: list[str]) -> pl.DataFrame:
         pl.read_csv(res.content, separator="\t")
         .rename(lambda s: s.strip("?"))
         .with_columns(
-            pl.all()
-            .str.strip_chars("<>")  # Remove < > around URLs
-            .str.strip_prefix("http://www.wikidata.org/entity/"),
+            # Remove < > around URLs and the entity prefix in a single pass
+            pl.all().str.replace_all(r"^<(?:http://www\.wikidata\.org/entity/)?|>$", ""),
         )
     )
+
+
+def query_wdqs_batched(query: str, qids: list[str], batch_size: int = 500) -> pl.DataFrame:
+    # Split long QID lists into several queries, WDQS allows up to 5 concurrent queries per client
+    batches = [qids[i : i + batch_size] for i in range(0, len(qids), batch_size)]
+    if not batches:  # pl.concat fails on an empty list, query_wdqs handles empty QID lists
+        return query_wdqs(query, qids)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        dfs = list(executor.map(lambda batch: query_wdqs(query, batch), batches))
+
+    # Columns may be inferred with different dtypes per batch, f.e. String for empty results
+    return pl.concat(dfs, how="vertical_relaxed")